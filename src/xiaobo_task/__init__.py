@@ -27,7 +27,7 @@ logger.configure(extra={"name": "MainApp"})
 from .domain import Target
 from .manager import TaskManager
 from .facade import XiaoboTask
-from .util import read_txt_file_lines, get_session, get_async_session
+from .util import read_txt_file_lines, get_session, get_async_session, get_thread_session, get_thread_async_session
 
 # 定义当 `from task_framework import *` 时要导入的名称
 __all__ = [
@@ -37,4 +37,6 @@ __all__ = [
     'read_txt_file_lines',  # 工具函数：按行读取文件
     'get_session',  # 工具函数：获取同步HTTP请求会话
     'get_async_session',  # 工具函数：获取异步HTTP请求会话
+    'get_thread_session',  # 工具函数：获取当前线程复用的同步HTTP请求会话
+    'get_thread_async_session',  # 工具函数：获取当前线程复用的异步HTTP请求会话
 ]
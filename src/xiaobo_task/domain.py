@@ -6,7 +6,7 @@ from typing import Any, Optional, TYPE_CHECKING
 if TYPE_CHECKING:
     from loguru import Logger
 
-@dataclass
+@dataclass(slots=True)
 class Target:
     """任务数据源的封装。
 
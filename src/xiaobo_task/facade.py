@@ -2,11 +2,14 @@ import asyncio
 import inspect
 import os
 import random
-import traceback
+import threading
+from concurrent.futures import CancelledError
+from contextvars import ContextVar
+from functools import partial
 from typing import Optional, Callable, Any, Dict, Tuple, List, Union, TYPE_CHECKING
 
 from loguru import logger
-from tenacity import retry, stop_after_attempt, wait_fixed
+from tenacity import Retrying, RetryCallState, stop_after_attempt, wait_fixed, wait_none
 
 from xiaobo_task.manager import TaskManager
 from xiaobo_task import util
@@ -16,6 +19,118 @@ from xiaobo_task.settings import Settings
 if TYPE_CHECKING:
     from loguru import Logger
 
+# 从 .env 文件和环境变量加载的基础配置，首次创建 XiaoboTask 时加载并在之后复用
+_base_settings: Optional[Settings] = None
+_base_settings_lock = threading.Lock()
+
+# 源文件路径到文件名的缓存，同一批失败任务通常抛出自同一个文件
+_basename_cache: Dict[str, str] = {}
+
+# 当前正在执行的任务名称，由 _execute_task 在工作线程中设置，供任务日志记录器读取
+_task_name_var: ContextVar[Optional[str]] = ContextVar('task_name', default=None)
+
+
+def _get_base_settings() -> Settings:
+    """获取缓存的基础配置，首次调用时读取 .env 文件和环境变量。"""
+    global _base_settings
+    if _base_settings is None:
+        with _base_settings_lock:
+            if _base_settings is None:
+                _base_settings = Settings()
+    return _base_settings
+
+
+def _patch_task_name(record):
+    """将当前任务名称写入日志记录，使所有任务共享同一个日志记录器。"""
+    task_name = _task_name_var.get()
+    if task_name is not None:
+        record["extra"]["name"] = task_name
+
+
+def _log_before_retry(retry_state: RetryCallState):
+    """重试前记录警告日志。Target 是传给 runner 的最后一个参数（也是任务函数的第一个参数）。"""
+    target = retry_state.args[-1] if retry_state.args else None
+    if target and target.logger:
+        exc = retry_state.outcome.exception()
+        target.logger.warning(
+            f"🔄 任务失败，将在 {retry_state.next_action.sleep:.2f} 秒后进行第 {retry_state.attempt_number} 次重试... "
+            f"异常: {repr(exc)}"
+        )
+
+
+def _log_task_error(target: Target, error: Exception, title: str = "任务执行失败"):
+    """记录任务（或回调）失败的日志，包含抛出异常的文件名和行号。"""
+    try:
+        # 直接走到最后一帧，避免 extract_tb 为每一帧读取源码行
+        tb = error.__traceback__
+        while tb.tb_next:
+            tb = tb.tb_next
+        path = tb.tb_frame.f_code.co_filename
+        filename = _basename_cache.get(path)
+        if filename is None:
+            filename = _basename_cache[path] = os.path.basename(path)
+        lineno = tb.tb_lineno
+        error_type = error.__class__.__name__
+        log_message = f"❌ {title} -> [{filename}:{lineno}] {error_type}: {error}"
+        target.logger.error(log_message)
+    except Exception:
+        target.logger.error(f"❌ {title} -> {error.__class__.__name__}: {error}")
+
+
+def _run_sync(task_func: Callable[..., Any], args: Tuple, kwargs: Dict[str, Any], target: Optional[Target]) -> Any:
+    """执行一次同步任务函数。"""
+    return task_func(target, *args, **kwargs)
+
+
+def _run_async(task_func: Callable[..., Any], args: Tuple, kwargs: Dict[str, Any], target: Optional[Target]) -> Any:
+    """在当前线程的事件循环中执行一次异步任务函数。"""
+    return util.run_coro(task_func(target, *args, **kwargs))
+
+
+def _execute_task(
+        runner: Callable[..., Any],
+        task_func: Callable[..., Any],
+        args: Tuple,
+        kwargs: Dict[str, Any],
+        retryer: Optional[Retrying],
+        on_success: Optional[Callable[[Target, Any], None]],
+        on_error: Optional[Callable[[Target, Exception], None]],
+        cancel_event: threading.Event,
+        task_names: Optional[List[str]],
+        target: Optional[Target],
+) -> Any:
+    """在工作线程中执行一个任务：按需重试，记录结果日志并调用用户回调。"""
+    if cancel_event.is_set():
+        raise CancelledError()
+    token = None
+    if target is not None:
+        task_name = task_names[target.index] if task_names is not None else f"{target.index + 1:05d}"
+        token = _task_name_var.set(task_name)
+    try:
+        try:
+            if retryer is None:
+                result = runner(task_func, args, kwargs, target)
+            else:
+                result = retryer(runner, task_func, args, kwargs, target)
+        except Exception as e:
+            _log_task_error(target, e)
+            if on_error is not None:
+                try:
+                    on_error(target, e)
+                except Exception as callback_error:
+                    _log_task_error(target, callback_error, "回调执行失败")
+            raise
+        target.logger.success(f"✅ 任务执行成功")
+        if on_success is not None:
+            try:
+                on_success(target, result)
+            except Exception as callback_error:
+                _log_task_error(target, callback_error, "回调执行失败")
+        return result
+    finally:
+        if token is not None:
+            _task_name_var.reset(token)
+
 
 class XiaoboTask:
     """任务框架的高级封装 (Facade)。
@@ -37,26 +152,54 @@ class XiaoboTask:
                       例如: max_workers=10, retries=5
         """
         self.logger = logger.bind(name=name)
+        # 所有任务共享的日志记录器，任务名称在执行时通过 _task_name_var 注入
+        self._task_logger = self.logger.patch(_patch_task_name)
 
-        # 过滤掉值为 None 的 kwargs，这样 pydantic 才会继续查找 env/default
-        filtered_kwargs = {k: v for k, v in kwargs.items() if v is not None}
+        # 过滤掉值为 None 的 kwargs，这样才会继续使用 env/default 中的值
+        # 配置项名称不区分大小写，与环境变量保持一致
+        filtered_kwargs = {k.lower(): v for k, v in kwargs.items() if v is not None}
+
+        # 在缓存的基础配置上叠加参数覆盖并重新验证，无需再次解析 .env 文件和环境变量
+        base_settings = _get_base_settings()
+        if filtered_kwargs:
+            self.settings = Settings.model_validate({**base_settings.model_dump(), **filtered_kwargs})
+        else:
+            self.settings = base_settings.model_copy()
 
-        # 使用 pydantic-settings 加载配置，并允许通过参数覆盖
-        self.settings = Settings(**filtered_kwargs)
+        # 初始化简化的 TaskManager，并预先启动全部工作线程；事件循环仍在首个异步任务执行时才创建
+        self._manager = TaskManager(max_workers=self.settings.max_workers, prestart=True)
 
-        # 初始化简化的 TaskManager
-        self._manager = TaskManager(max_workers=self.settings.max_workers)
+        # 为 True 时，正常退出 'with' 语句也会取消尚未开始执行的任务
+        self.cancel_on_exit = False
+        # 设置后，尚未开始执行的任务会被直接跳过（其 Future 以 CancelledError 结束）
+        self._cancel_event = threading.Event()
+
+        # 实例独立的随机数生成器，用于打乱任务顺序，不与全局 random 模块共享状态
+        self._rng = random.Random()
+
+        # 按 (重试次数, 重试延迟) 缓存 Retrying 控制器，tenacity 保证其可在多线程间共享
+        self._retryers: Dict[Tuple[int, float], Retrying] = {}
 
         # 记录加载的配置信息
         self._log_settings()
 
+    @staticmethod
+    def reload_env():
+        """重新读取 .env 文件和环境变量，之后创建的 XiaoboTask 实例将使用新的配置。"""
+        global _base_settings
+        with _base_settings_lock:
+            _base_settings = Settings()
+
     def _log_settings(self):
-        """以中文格式，逐行记录加载的配置信息，并处理中文字符对齐。"""
+        """以中文格式记录加载的配置信息，所有配置项合并为一条多行日志。"""
 
-        self.logger.info("--- 任务配置加载开始 ---")
+        # INFO 级别的日志不会被输出时，跳过所有格式化工作
+        if self.logger._core.min_level > logger.level("INFO").no:
+            return
 
         # 遍历 pydantic 模型的字段以获取描述和值
-        for field_name, field_info in self.settings.model_fields.items():
+        lines = ["--- 任务配置加载开始 ---"]
+        for field_name, field_info in type(self.settings).model_fields.items():
             description = field_info.description or field_name
             value = getattr(self.settings, field_name)
 
@@ -68,9 +211,53 @@ class XiaoboTask:
             else:
                 value_str = str(value)
 
-            self.logger.info(f"{description}: {value_str}")
+            lines.append(f"{description}: {value_str}")
+        lines.append("--- 配置加载完毕 ---")
+
+        self.logger.info("\n".join(lines))
+
+    def _build_executor(
+            self,
+            task_func: Callable[..., Any],
+            on_success: Optional[Callable[[Target, Any], None]] = None,
+            on_error: Optional[Callable[[Target, Exception], None]] = None,
+            retries: Optional[int] = None,
+            retry_delay: Optional[float] = None,
+            args: Tuple = (),
+            kwargs: Optional[Dict[str, Any]] = None,
+            task_names: Optional[List[str]] = None,
+    ) -> Callable[[Target], Any]:
+        """将任务函数与额外参数、回调、重试策略绑定，返回只接收 Target 的执行函数。"""
+        effective_retries = retries if retries is not None else self.settings.retries
+        effective_retry_delay = retry_delay if retry_delay is not None else self.settings.retry_delay
+        # 任务函数的类型只判断一次，而不是在每个任务的每次尝试中重复判断
+        runner = _run_async if inspect.iscoroutinefunction(task_func) else _run_sync
+        retryer = self._get_retryer(effective_retries, effective_retry_delay)
+        return partial(
+            _execute_task, runner, task_func, tuple(args), kwargs or {}, retryer, on_success, on_error,
+            self._cancel_event, task_names
+        )
+
+    def _get_retryer(self, retries: int, retry_delay: float) -> Optional[Retrying]:
+        """获取（或创建并缓存）指定重试策略的 Retrying 控制器，不需要重试时返回 None。
 
-        self.logger.info("--- 配置加载完毕 ---")
+        返回 None 时 _execute_task 会直接调用任务函数，完全绕过 tenacity 的状态机。
+        """
+        # submit_task/submit_tasks 传入的 retries 未经 Settings 校验，负数同样视为不重试
+        if retries <= 0:
+            return None
+
+        key = (retries, retry_delay)
+        retryer = self._retryers.get(key)
+        if retryer is None:
+            retryer = Retrying(
+                stop=stop_after_attempt(retries + 1),
+                wait=wait_fixed(retry_delay) if retry_delay > 0 else wait_none(),
+                before_sleep=_log_before_retry,
+                reraise=True
+            )
+            self._retryers[key] = retryer
+        return retryer
 
     def submit_task(
             self,
@@ -80,69 +267,17 @@ class XiaoboTask:
             on_error: Optional[Callable[[Target, Exception], None]] = None,
             retries: Optional[int] = None,
             retry_delay: Optional[float] = None,
+            args: Tuple = (),
+            kwargs: Optional[Dict[str, Any]] = None,
     ):
         """提交一个新任务。
 
-        此方法现在负责包装任务函数，为其添加重试和异步处理逻辑，
+        此方法现在负责包装任务函数，为其添加重试、异步处理和回调逻辑，
         然后将包装好的函数提交给底层的 TaskManager。
+        任务函数以 task_func(target, *args, **kwargs) 的形式调用。
         """
-
-        def on_task_success(t: Target, result: Any):
-            t.logger.success(f"✅ 任务执行成功")
-            if on_success:
-                on_success(t, result)
-
-        def on_task_error(t: Target, error: Exception):
-            try:
-                tb = error.__traceback__
-                last_frame = traceback.extract_tb(tb)[-1]
-                filename = os.path.basename(last_frame.filename)
-                lineno = last_frame.lineno
-                error_type = error.__class__.__name__
-                log_message = f"❌ 任务执行失败 -> [{filename}:{lineno}] {error_type}: {error}"
-                t.logger.error(log_message)
-            except Exception:
-                t.logger.error(f"❌ 任务执行失败 -> {error.__class__.__name__}: {error}")
-
-            if on_error:
-                on_error(t, error)
-
-        effective_retries = retries if retries is not None else self.settings.retries
-        effective_retry_delay = retry_delay if retry_delay is not None else self.settings.retry_delay
-
-        # --- 将所有执行逻辑包装到一个函数中 ---
-        def _wrapped_task_executor():
-
-            def log_before_retry(retry_state):
-                if target and target.logger:
-                    exc = retry_state.outcome.exception()
-                    target.logger.warning(
-                        f"🔄 任务失败，将在 {retry_state.next_action.sleep:.2f} 秒后进行第 {retry_state.attempt_number} 次重试... "
-                        f"异常: {repr(exc)}"
-                    )
-
-            @retry(
-                stop=stop_after_attempt(effective_retries + 1),
-                wait=wait_fixed(effective_retry_delay) if effective_retry_delay > 0 else None,
-                before_sleep=log_before_retry,
-                reraise=True
-            )
-            def task_to_run():
-                if inspect.iscoroutinefunction(task_func):
-                    loop = util.get_or_create_event_loop()
-                    return loop.run_until_complete(task_func(target))
-                else:
-                    return task_func(target)
-
-            return task_to_run()
-
-        # --- 包装结束 ---
-        return self._manager.submit_task(
-            task_func=_wrapped_task_executor,
-            target=target,
-            on_success=on_task_success,
-            on_error=on_task_error,
-        )
+        executor = self._build_executor(task_func, on_success, on_error, retries, retry_delay, args, kwargs)
+        return self._manager.submit_task(task_func=partial(executor, target), target=target)
 
     def submit_tasks(
             self,
@@ -152,6 +287,9 @@ class XiaoboTask:
             on_error: Optional[Callable[[Target, Exception], None]] = None,
             retries: Optional[int] = None,
             retry_delay: Optional[float] = None,
+            shuffle_inplace: bool = False,
+            args: Tuple = (),
+            kwargs: Optional[Dict[str, Any]] = None,
     ):
         """
         根据指定的源批量提交任务。
@@ -162,13 +300,19 @@ class XiaoboTask:
             source (Union[int, List[Any]]): 任务源。
             task_func (Callable): 要执行的任务函数。
             ... (其他参数)
+            shuffle_inplace (bool): 启用打乱时直接打乱传入的列表，而不是先复制一份。
+            args (Tuple): 传给每个任务函数的额外位置参数，位于 Target 之后。
+            kwargs (Optional[Dict]): 传给每个任务函数的额外关键字参数。
         """
         if isinstance(source, int):
             items = range(source)
         elif isinstance(source, list):
-            items = source[:]
+            # 仅在需要打乱且不允许修改原列表时才复制
+            items = source
             if self.settings.shuffle:
-                random.shuffle(items)
+                if not shuffle_inplace:
+                    items = source[:]
+                self._rng.shuffle(items)
         else:
             raise TypeError("'source' 必须是 int 或 list 类型。")
 
@@ -176,26 +320,29 @@ class XiaoboTask:
             self.logger.warning("任务数量必须大于 0。")
             return
 
-        for index, item in enumerate(items):
-            task_name = f"{index + 1:05d}"
-            task_logger = self.logger.bind(name=task_name)
-
-            proxy = None
-            if not self.settings.disable_proxy:
-                p = self.settings.proxy_ipv6 if self.settings.use_ipv6 and self.settings.proxy_ipv6 else self.settings.proxy
-                if p:
-                    proxy = p.replace('*****', str(item))
-
-            target = Target(index=index, data=item, proxy=proxy, logger=task_logger)
-
-            self.submit_task(
-                task_func=task_func,
-                target=target,
-                on_success=on_success,
-                on_error=on_error,
-                retries=retries,
-                retry_delay=retry_delay,
-            )
+        # 代理模板在整批任务中保持不变，只需解析一次
+        template = None
+        if not self.settings.disable_proxy:
+            template = self.settings.proxy_ipv6 if self.settings.use_ipv6 and self.settings.proxy_ipv6 else self.settings.proxy
+
+        if template and '*****' in template:
+            proxies = [template.replace('*****', str(item)) for item in items]
+        else:
+            proxies = [template or None] * len(items)
+
+        task_logger = self._task_logger
+        targets = [
+            Target(index=index, data=item, proxy=proxy, logger=task_logger)
+            for index, (item, proxy) in enumerate(zip(items, proxies))
+        ]
+
+        # 一次性生成整批任务的名称（由 C 实现的 % 格式化完成），避免每个任务单独格式化
+        task_names = list(map("%05d".__mod__, range(1, len(items) + 1)))
+        # 整批任务共享同一个执行函数与回调，避免逐个任务重复构建闭包
+        executor = self._build_executor(
+            task_func, on_success, on_error, retries, retry_delay, args, kwargs, task_names
+        )
+        self._manager.submit_many(task_func=executor, targets=targets)
 
     def submit_tasks_from_file(
             self,
@@ -206,6 +353,8 @@ class XiaoboTask:
             on_error: Optional[Callable[[Target, Exception], None]] = None,
             retries: Optional[int] = None,
             retry_delay: Optional[float] = None,
+            args: Tuple = (),
+            kwargs: Optional[Dict[str, Any]] = None,
     ):
         """
         从文件中读取数据并批量提交任务。
@@ -225,6 +374,9 @@ class XiaoboTask:
             on_error=on_error,
             retries=retries,
             retry_delay=retry_delay,
+            shuffle_inplace=True,  # source_list 由本方法创建，可以直接打乱
+            args=args,
+            kwargs=kwargs,
         )
 
     def __enter__(self):
@@ -232,5 +384,14 @@ class XiaoboTask:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """在 'with' 语句结束时，安全关闭底层的 TaskManager。"""
-        self._manager.shutdown()
+        """在 'with' 语句结束时，安全关闭底层的 TaskManager。
+
+        'with' 块内抛出异常时，取消所有尚未开始执行的任务并立即返回，不再等待；
+        否则等待所有任务执行完毕（若 cancel_on_exit 为 True，则先取消尚未开始的任务）。
+        """
+        # 不使用 cancel_futures 取消任务，否则排在最后的事件循环关闭任务也会被一并取消
+        if exc_type is not None or self.cancel_on_exit:
+            self._cancel_event.set()
+        # 每个工作线程处理完（或跳过）已提交的任务后，在该线程上关闭它创建的事件循环
+        self._manager.run_on_each_worker(util.close_event_loop)
+        self._manager.shutdown(wait=exc_type is None)
@@ -1,8 +1,9 @@
 import asyncio
 import inspect
+import os
 import threading
-from concurrent.futures import ThreadPoolExecutor, Future
-from typing import Callable, Any, Optional, Tuple, Dict
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import Callable, Any, Optional, Tuple, Dict, List
 
 from xiaobo_task.domain import Target
 
@@ -14,9 +15,48 @@ class TaskManager:
     所有复杂的执行逻辑（如重试、异步处理）都由调用方处理。
     """
 
-    def __init__(self, max_workers: Optional[int] = None):
-        """初始化 TaskManager。"""
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+    def __init__(
+            self,
+            max_workers: Optional[int] = None,
+            initializer: Optional[Callable[..., Any]] = None,
+            initargs: Tuple = (),
+            prestart: bool = False,
+    ):
+        """初始化 TaskManager。
+
+        参数:
+            max_workers (Optional[int]): 线程池的最大工作线程数。
+            initializer (Optional[Callable]): 每个工作线程启动时调用的初始化函数。
+            initargs (Tuple): 传递给初始化函数的参数。
+            prestart (bool): 是否立即创建全部工作线程，而不是在提交任务时按需创建。
+        """
+        # 与 ThreadPoolExecutor 的默认值保持一致；其他非法值（如 0）仍交由 ThreadPoolExecutor 报错
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, initializer=initializer, initargs=initargs)
+        if prestart:
+            wait(self.run_on_each_worker(None, timeout=10))
+
+    def run_on_each_worker(self, func: Optional[Callable[[], Any]], timeout: Optional[float] = None) -> List[Future]:
+        """在每个工作线程上各执行一次 func，尚未启动的工作线程会被立即创建。
+
+        ThreadPoolExecutor 在有空闲线程时不会新建线程，也不保证任务的分配方式，因此每个
+        任务执行完 func 后都会在屏障处等待，直到所有线程都各自领取了一个任务后才一起结束。
+        这些任务排在已提交的任务之后执行。
+
+        参数:
+            func (Optional[Callable]): 要在每个工作线程中执行的函数，为 None 时仅启动线程。
+            timeout (Optional[float]): 在屏障处等待的超时时间（秒），为 None 时一直等待。
+        """
+        barrier = threading.Barrier(self.max_workers)
+
+        def job():
+            if func is not None:
+                func()
+            barrier.wait(timeout)
+
+        return [self.executor.submit(job) for _ in range(self.max_workers)]
 
     def submit_task(
             self,
@@ -36,11 +76,50 @@ class TaskManager:
         # 直接提交调用方传入的、不带参数的包装函数
         future = self.executor.submit(task_func)
 
-        future.add_done_callback(
-            lambda f: self._task_done_callback(f, target, on_success, on_error)
-        )
+        # 没有回调时不注册完成回调，例如回调已由包装函数自行处理
+        if on_success or on_error:
+            future.add_done_callback(
+                lambda f: self._task_done_callback(f, target, on_success, on_error)
+            )
         return future
 
+    def submit_many(
+            self,
+            task_func: Callable[[Target], Any],
+            targets: List[Target],
+            on_success: Optional[Callable[[Target, Any], None]] = None,
+            on_error: Optional[Callable[[Target, Exception], None]] = None,
+    ) -> List[Future]:
+        """批量提交任务到线程池执行。
+
+        所有任务共享同一个执行函数和同一个完成回调，每个任务只需额外传入自己的 Target，
+        避免逐个任务创建包装函数和 lambda。
+
+        参数:
+            task_func (Callable): 要在工作线程中执行的函数，以 Target 作为唯一参数调用。
+            targets (List[Target]): 每个任务对应的 Target 对象列表。
+            on_success (Optional[Callable]): 任务成功完成时调用的回调函数。
+            on_error (Optional[Callable]): 任务执行过程中发生异常时调用的回调函数。
+        """
+        submit = self.executor.submit
+
+        if not (on_success or on_error):
+            return [submit(task_func, target) for target in targets]
+
+        pending: Dict[Future, Target] = {}
+
+        def done_callback(f: Future):
+            self._task_done_callback(f, pending.pop(f), on_success, on_error)
+
+        futures = []
+        for target in targets:
+            future = submit(task_func, target)
+            # 先登记 Target 再添加回调，因为已完成的 Future 会立即在当前线程触发回调
+            pending[future] = target
+            future.add_done_callback(done_callback)
+            futures.append(future)
+        return futures
+
     def _task_done_callback(
             self,
             future: Future,
@@ -57,9 +136,14 @@ class TaskManager:
             if on_error:
                 on_error(target, e)
 
-    def shutdown(self, wait: bool = True):
-        """关闭线程池"""
-        self.executor.shutdown(wait=wait)
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        """关闭线程池
+
+        参数:
+            wait (bool): 是否等待所有已开始执行的任务完成后再返回。
+            cancel_futures (bool): 是否取消所有尚未开始执行的任务。
+        """
+        self.executor.shutdown(wait=wait, cancel_futures=cancel_futures)
 
     def __enter__(self):
         return self
@@ -2,7 +2,7 @@
 
 from typing import Optional, Any
 
-from pydantic import Field, field_validator, FieldValidationInfo
+from pydantic import Field, field_validator, ValidationInfo
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -11,7 +11,8 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file='.env',
         env_file_encoding='utf-8',
-        case_sensitive=False  # 环境变量名不区分大小写
+        case_sensitive=False,  # 环境变量名不区分大小写
+        env_ignore_empty=True  # 值为空字符串的环境变量视为未设置，使用默认值
     )
 
     # --- 线程池配置 ---
@@ -28,10 +29,17 @@ class Settings(BaseSettings):
     use_ipv6: bool = Field(default=False, description="使用IPv6代理")
     disable_proxy: bool = Field(default=False, description="禁用代理")
 
-    @field_validator('*', mode='before')
+    @field_validator('proxy', 'proxy_ipv6', mode='before')
     @classmethod
-    def empty_str_to_default(cls, v: Any, info: FieldValidationInfo) -> Any:
-        """在验证前，将空字符串转换成该字段的默认值。"""
+    def empty_str_to_default(cls, v: Any, info: ValidationInfo) -> Any:
+        """在验证前，将直接传入的空字符串转换成该字段的默认值。
+
+        来自 .env 文件和环境变量的空值已由 env_ignore_empty 处理，这里只需处理字符串字段。
+        """
         if v == "":
-            return cls.model_fields[info.field_name].default
+            return _DEFAULTS[info.field_name]
         return v
+
+
+# 预先计算各字段的默认值，供验证器直接查表
+_DEFAULTS = {name: f.default for name, f in Settings.model_fields.items()}
@@ -4,9 +4,13 @@ import asyncio
 import time
 from typing import List
 
+import pytest
+from loguru import logger
+
 # Correctly import the classes we created
 from xiaobo_task.facade import XiaoboTask
 from xiaobo_task.domain import Target
+from xiaobo_task.manager import TaskManager
 
 
 # --- Test Task Functions ---
@@ -87,8 +91,8 @@ def test_submit_tasks_from_file(tmp_path):
 
     assert len(results) == 2
     # The data passed to the task is a list of strings from the split line
-    assert results[0] == ["line1", "data"]
-    assert results[1] == ["line2", "data"]
+    # 两个工作线程并发执行，结果的先后顺序不固定
+    assert sorted(results) == [["line1", "data"], ["line2", "data"]]
 
 
 def test_callbacks_on_success_and_error():
@@ -124,6 +128,157 @@ def test_callbacks_on_success_and_error():
     assert isinstance(error_results[0], ValueError)
 
 
+def test_callback_errors_are_logged():
+    """测试回调函数抛出的异常会被记录，且不会覆盖任务本身的异常。"""
+    messages = []
+    sink_id = logger.add(lambda m: messages.append(m.record["message"]), level="ERROR")
+
+    def broken_success(target, result):
+        raise RuntimeError("success callback bug")
+
+    def broken_error(target, error):
+        raise RuntimeError("error callback bug")
+
+    def task(source: Target):
+        if source.index == 1:
+            raise ValueError("task failed")
+        return source.data
+
+    try:
+        with XiaoboTask(max_workers=1, retries=0) as runner:
+            runner.submit_tasks(
+                source=["ok", "fail"],
+                task_func=task,
+                on_success=broken_success,
+                on_error=broken_error,
+            )
+            future = runner.submit_task(task, Target(index=1, data="fail", logger=runner.logger), on_error=broken_error)
+        assert isinstance(future.exception(), ValueError)
+    finally:
+        logger.remove(sink_id)
+
+    assert any("回调执行失败" in m and "success callback bug" in m for m in messages)
+    assert any("回调执行失败" in m and "error callback bug" in m for m in messages)
+    assert any("任务执行失败" in m and "task failed" in m for m in messages)
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    """清除相关环境变量并重新加载基础配置，测试结束后恢复环境并再次重新加载。"""
+    for name in ("MAX_WORKERS", "RETRIES", "RETRY_DELAY", "PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    XiaoboTask.reload_env()
+    yield monkeypatch
+    monkeypatch.undo()
+    XiaoboTask.reload_env()
+
+
+def test_kwargs_override_merged_onto_cached_settings(clean_env):
+    """测试构造参数会叠加在缓存的基础配置上，且参数名不区分大小写。"""
+    clean_env.setenv("RETRY_DELAY", "1.5")
+    XiaoboTask.reload_env()
+
+    with XiaoboTask(max_workers=3) as runner:
+        assert runner.settings.max_workers == 3
+        assert runner.settings.retry_delay == 1.5
+
+    with XiaoboTask(MAX_WORKERS=4) as runner:
+        assert runner.settings.max_workers == 4
+
+
+def test_env_change_requires_reload_env(clean_env):
+    """测试环境变量的变化只有在 reload_env() 之后才会生效。"""
+    with XiaoboTask() as runner:
+        assert runner.settings.retries == 2
+
+    clean_env.setenv("RETRIES", "4")
+    with XiaoboTask() as runner:
+        assert runner.settings.retries == 2
+
+    XiaoboTask.reload_env()
+    with XiaoboTask() as runner:
+        assert runner.settings.retries == 4
+
+
+def test_empty_env_values_use_defaults(clean_env):
+    """测试值为空字符串的环境变量被视为未设置。"""
+    clean_env.setenv("RETRIES", "")
+    clean_env.setenv("PROXY", "")
+    XiaoboTask.reload_env()
+
+    with XiaoboTask() as runner:
+        assert runner.settings.retries == 2
+        assert runner.settings.proxy is None
+
+
+def test_pending_tasks_cancelled_when_with_block_raises():
+    """测试 'with' 块内抛出异常时，尚未开始执行的任务会被取消。"""
+    results = []
+
+    def slow_task(source: Target):
+        time.sleep(0.05)
+        results.append(source.data)
+
+    with pytest.raises(RuntimeError):
+        with XiaoboTask(max_workers=1) as runner:
+            runner.submit_tasks(source=20, task_func=slow_task)
+            raise RuntimeError("abort")
+
+    time.sleep(0.2)
+    assert len(results) < 20
+
+
+def test_shuffle_does_not_modify_source_unless_inplace():
+    """测试启用打乱时，只有 shuffle_inplace=True 才会修改调用方的列表。"""
+    items = list(range(50))
+    results = []
+    with XiaoboTask(max_workers=2, shuffle=True) as runner:
+        runner.submit_tasks(source=items, task_func=sync_task, kwargs={"results_list": results})
+    assert items == list(range(50))
+    assert sorted(results) == items
+
+    with XiaoboTask(max_workers=2, shuffle=True) as runner:
+        runner.submit_tasks(source=items, task_func=lambda source: None, shuffle_inplace=True)
+    assert items != list(range(50))
+    assert sorted(items) == list(range(50))
+
+
+def test_task_manager_submit_many_with_prestart():
+    """测试 TaskManager 预先启动全部线程，并通过 submit_many 批量提交任务和回调。"""
+    success, errors = [], []
+
+    def task(target: Target):
+        if target.index == 1:
+            raise ValueError("boom")
+        return target.data
+
+    with TaskManager(max_workers=3, prestart=True) as manager:
+        assert len(manager.executor._threads) == 3
+        futures = manager.submit_many(
+            task,
+            [Target(index=i, data=i) for i in range(3)],
+            on_success=lambda t, r: success.append(r),
+            on_error=lambda t, e: errors.append(t.index),
+        )
+
+    assert sorted(success) == [0, 2]
+    assert errors == [1]
+    assert isinstance(futures[1].exception(), ValueError)
+
+
+def test_exit_inside_running_event_loop():
+    """测试在已有运行中的事件循环（如 Jupyter、async 函数）内退出 XiaoboTask。"""
+    results = []
+    items = ["loop_a", "loop_b", "loop_c"]
+
+    async def main():
+        with XiaoboTask(max_workers=2) as runner:
+            runner.submit_tasks(source=items, task_func=async_task, kwargs={"results_list": results})
+
+    asyncio.run(main())
+    assert sorted(results) == sorted(items)
+
+
 
 
 test_submit_tasks_with_list_source()
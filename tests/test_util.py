@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import threading
+
+from xiaobo_task.util import get_session, get_async_session, get_thread_session, get_thread_async_session
+
+
+def test_get_session_returns_isolated_sessions():
+    """测试 get_session 每次返回新的会话，cookies 和 headers 不会在任务间共享。"""
+    a = get_session()
+    a.cookies.set('token', 'account-A')
+    a.headers['Authorization'] = 'Bearer A'
+
+    b = get_session()
+    assert b is not a
+    assert b.cookies.get('token') is None
+    assert 'Authorization' not in b.headers
+
+
+def test_get_async_session_returns_new_session():
+    """测试 get_async_session 每次返回新的会话。"""
+    assert get_async_session() is not get_async_session()
+
+
+def test_get_thread_session_reuses_per_thread():
+    """测试 get_thread_session 在同一线程内复用会话，关闭后重新创建，不同线程互不共享。"""
+    a = get_thread_session(proxy='http://127.0.0.1:1')
+    assert get_thread_session(proxy='http://127.0.0.1:1') is a
+    assert get_thread_session(proxy='http://127.0.0.1:2') is not a
+
+    others = []
+    t = threading.Thread(target=lambda: others.append(get_thread_session(proxy='http://127.0.0.1:1')))
+    t.start()
+    t.join()
+    assert others[0] is not a
+
+    a.close()
+    assert get_thread_session(proxy='http://127.0.0.1:1') is not a
+
+
+def test_get_thread_async_session_rebinds_to_new_loop():
+    """测试绑定的事件循环关闭后，get_thread_async_session 会返回新的会话。"""
+
+    async def use_session():
+        session = get_thread_async_session()
+        # 访问 loop 属性会将会话绑定到当前运行中的事件循环
+        assert session.loop is asyncio.get_running_loop()
+        assert get_thread_async_session() is session
+        return session
+
+    first = asyncio.run(use_session())
+    second = asyncio.run(use_session())
+    assert second is not first